@@ -2,11 +2,16 @@
 Pydantic models for API request/response validation.
 """
 
-from pydantic import BaseModel, Field, field_validator
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 
 
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime (API timestamps carry no offset)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class PredictionRequest(BaseModel):
     """Request model for prediction endpoint."""
     horizon_days: int = Field(
@@ -111,4 +116,4 @@ class ErrorResponse(BaseModel):
     error: str = Field(description="Error type")
     message: str = Field(description="Error message")
     details: Optional[Any] = Field(None, description="Additional error details")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Error timestamp")
\ No newline at end of file
+    timestamp: datetime = Field(default_factory=utc_now, description="Error timestamp")
\ No newline at end of file
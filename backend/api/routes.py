@@ -3,12 +3,13 @@ API routes for the FastAPI application.
 """
 
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse
-from datetime import datetime
-from typing import List
+from fastapi import APIRouter, Depends, Request, UploadFile, File, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Any, Optional, Tuple
+import os
 import uuid
-import pandas as pd
+import shutil
+import threading
 from pathlib import Path
 
 from backend.api.models import (
@@ -19,43 +20,188 @@ from backend.api.models import (
     MetricsResponse,
     ModelInfoResponse,
     HealthResponse,
-    ErrorResponse
+    ErrorResponse,
+    utc_now
 )
-from backend.services.prediction_service import get_prediction_service
+from backend.services.prediction_service import PredictionService, get_prediction_service
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Chunk size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Upload types resolved to their most recent file
+UPLOAD_FILE_TYPES = ('supplies', 'temperature', 'fires')
+
+# Last upload directory scan, keyed by (directory, st_mtime_ns) and the
+# (path, size, st_mtime_ns) of every file it resolved
+_latest_uploads_cache: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = None
+_latest_uploads_lock = threading.Lock()
+
 # Create router
 router = APIRouter()
 
 
-@router.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+def _count_csv_rows(file_path: Path) -> int:
+    """
+    Count data rows in a CSV file by scanning for newlines.
+
+    Args:
+        file_path: Path to CSV file
+
+    Returns:
+        Number of rows excluding the header, or -1 if the file is empty
+    """
+    line_count = 0
+    last_byte = b''
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            line_count += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+
+    # Last line without a trailing newline
+    if last_byte and last_byte != b'\n':
+        line_count += 1
+
+    return line_count - 1
+
+
+def _scan_uploads(upload_dir: Path) -> Dict[str, Any]:
+    """
+    Resolve uploaded data files in a single directory scan.
+
+    Args:
+        upload_dir: Directory with uploaded CSV files
+
+    Returns:
+        Dictionary with the most recent supplies, temperature and fires paths
+        (or None) and the list of all weather paths
+    """
+    latest: Dict[str, Any] = {}
+    latest_mtime: Dict[str, float] = {}
+    weather_paths = []
+
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.endswith('.csv') or not entry.is_file():
+                continue
+
+            if '_weather_' in name:
+                weather_paths.append(entry.path)
+
+            for file_type in UPLOAD_FILE_TYPES:
+                if f'_{file_type}_' not in name:
+                    continue
+                mtime = entry.stat().st_mtime
+                if file_type not in latest_mtime or mtime > latest_mtime[file_type]:
+                    latest_mtime[file_type] = mtime
+                    latest[file_type] = entry.path
+
+    return {
+        'supplies': latest.get('supplies'),
+        'temperature': latest.get('temperature'),
+        'fires': latest.get('fires'),
+        'weather': weather_paths
+    }
+
+
+def _resolved_file_stats(uploads: Dict[str, Any]) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    Stat every file resolved by a scan.
+
+    Args:
+        uploads: Dictionary in the format of _scan_uploads
+
+    Returns:
+        Tuple of (path, size, st_mtime_ns) per resolved file
+
+    Raises:
+        FileNotFoundError: If a resolved file has been removed
+    """
+    paths = [uploads[file_type] for file_type in UPLOAD_FILE_TYPES if uploads[file_type]]
+    paths.extend(uploads['weather'])
+    stats = []
+    for path in paths:
+        stat = os.stat(path)
+        stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(stats)
+
+
+def _latest_uploads(upload_dir: Path) -> Dict[str, Any]:
+    """
+    Resolve uploaded data files, reusing the last scan while the directory and
+    the resolved files are unchanged.
+
+    Args:
+        upload_dir: Directory with uploaded CSV files
+
+    Returns:
+        Dictionary in the format of _scan_uploads (a copy owned by the caller)
+    """
+    global _latest_uploads_cache
+
+    try:
+        dir_key = (str(upload_dir), upload_dir.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return {'supplies': None, 'temperature': None, 'fires': None, 'weather': []}
+
+    with _latest_uploads_lock:
+        uploads = None
+        if _latest_uploads_cache is not None and _latest_uploads_cache[0][0] == dir_key:
+            # Uploads still being written do not touch the directory mtime, so the
+            # resolved files themselves must be unchanged as well
+            cached_uploads = _latest_uploads_cache[1]
+            try:
+                if _resolved_file_stats(cached_uploads) == _latest_uploads_cache[0][1]:
+                    uploads = cached_uploads
+            except FileNotFoundError:
+                pass
+
+        if uploads is None:
+            uploads = _scan_uploads(upload_dir)
+            try:
+                _latest_uploads_cache = ((dir_key, _resolved_file_stats(uploads)), uploads)
+            except FileNotFoundError:
+                _latest_uploads_cache = None
+
+    return {**uploads, 'weather': list(uploads['weather'])}
+
+
+@router.get(
+    "/health",
+    response_model=None,
+    responses={200: {"model": HealthResponse}},
+    tags=["Health"]
+)
+async def health_check(request: Request):
     """
     Health check endpoint.
 
     Returns service status and model availability.
     """
-    service = get_prediction_service()
-
     return HealthResponse(
         status="healthy",
-        timestamp=datetime.utcnow(),
-        model_loaded=service.is_model_loaded(),
+        timestamp=utc_now(),
+        model_loaded=getattr(request.app.state, "model_loaded", False),
         version=settings.VERSION
     )
 
 
-@router.get("/model/info", response_model=ModelInfoResponse, tags=["Model"])
-async def get_model_info():
+@router.get(
+    "/model/info",
+    response_model=None,
+    responses={200: {"model": ModelInfoResponse}},
+    tags=["Model"]
+)
+async def get_model_info(service: PredictionService = Depends(get_prediction_service)):
     """
     Get information about the loaded ML model.
 
     Returns model type, features, and training metrics.
     """
     try:
-        service = get_prediction_service()
         info = service.get_model_info()
 
         return ModelInfoResponse(
@@ -74,7 +220,12 @@ async def get_model_info():
         )
 
 
-@router.post("/upload/csv", response_model=FileUploadResponse, tags=["Upload"])
+@router.post(
+    "/upload/csv",
+    response_model=None,
+    responses={200: {"model": FileUploadResponse}},
+    tags=["Upload"]
+)
 async def upload_csv_file(
     file: UploadFile = File(...),
     file_type: str = "data"
@@ -106,14 +257,17 @@ async def upload_csv_file(
 
         file_path = upload_dir / f"{upload_id}_{file_type}_{file.filename}"
 
-        # Read and save file
-        content = await file.read()
+        # Stream file to disk in fixed-size chunks
         with open(file_path, 'wb') as f:
-            f.write(content)
+            shutil.copyfileobj(file.file, f, length=UPLOAD_CHUNK_SIZE)
 
         # Validate CSV
-        df = pd.read_csv(file_path)
-        row_count = len(df)
+        row_count = _count_csv_rows(file_path)
+        if row_count < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is empty"
+            )
 
         logger.info(f"File uploaded: {file.filename} ({row_count} rows)")
 
@@ -125,14 +279,11 @@ async def upload_csv_file(
             validation_status="success",
             errors=[],
             warnings=[],
-            uploaded_at=datetime.utcnow()
+            uploaded_at=utc_now()
         )
 
-    except pd.errors.EmptyDataError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Uploaded file is empty"
-        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading file: {e}")
         raise HTTPException(
@@ -141,8 +292,16 @@ async def upload_csv_file(
         )
 
 
-@router.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
-async def create_prediction(request: PredictionRequest):
+@router.post(
+    "/predict",
+    response_model=None,
+    responses={200: {"model": PredictionResponse}},
+    tags=["Prediction"]
+)
+async def create_prediction(
+    request: PredictionRequest,
+    service: PredictionService = Depends(get_prediction_service)
+):
     """
     Generate fire predictions for all piles.
 
@@ -155,30 +314,32 @@ async def create_prediction(request: PredictionRequest):
     Returns:
         Prediction results with fire dates and risk levels
     """
-    start_time = datetime.utcnow()
+    start_time = utc_now()
     prediction_id = str(uuid.uuid4())
 
     try:
-        service = get_prediction_service()
-
         # For demo purposes, we'll look for uploaded files
         upload_dir = Path(settings.UPLOAD_DIR)
 
         # Find most recent uploaded files
-        supplies_files = list(upload_dir.glob("*_supplies_*.csv"))
-        temperature_files = list(upload_dir.glob("*_temperature_*.csv"))
-        weather_files = list(upload_dir.glob("*_weather_*.csv"))
+        uploads = _latest_uploads(upload_dir)
 
-        if not supplies_files or not temperature_files:
+        if not uploads['supplies'] or not uploads['temperature']:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Required data files not found. Please upload supplies and temperature data first."
             )
 
+        if not uploads['weather']:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Weather data files not found. Please upload at least one weather file first."
+            )
+
         # Use most recent files
-        supplies_path = str(max(supplies_files, key=lambda p: p.stat().st_mtime))
-        temperature_path = str(max(temperature_files, key=lambda p: p.stat().st_mtime))
-        weather_paths = [str(p) for p in weather_files]
+        supplies_path = uploads['supplies']
+        temperature_path = uploads['temperature']
+        weather_paths = uploads['weather']
 
         logger.info(f"Generating predictions with horizon={request.horizon_days} days")
 
@@ -186,7 +347,7 @@ async def create_prediction(request: PredictionRequest):
         predictions, date_range_info = service.predict_from_csv_files(
             supplies_path=supplies_path,
             temperature_path=temperature_path,
-            weather_paths=weather_paths if weather_paths else [],
+            weather_paths=weather_paths,
             horizon_days=request.horizon_days
         )
 
@@ -201,9 +362,9 @@ async def create_prediction(request: PredictionRequest):
         )
 
         # Calculate processing time
-        processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        processing_time = (utc_now() - start_time).total_seconds() * 1000
 
-        return PredictionResponse(
+        response = PredictionResponse(
             prediction_id=prediction_id,
             status="completed",
             predictions=predictions,
@@ -214,6 +375,7 @@ async def create_prediction(request: PredictionRequest):
             processing_time_ms=processing_time,
             date_range=date_range_info
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
 
     except HTTPException:
         raise
@@ -225,8 +387,16 @@ async def create_prediction(request: PredictionRequest):
         )
 
 
-@router.post("/evaluate", response_model=MetricsResponse, tags=["Evaluation"])
-async def evaluate_predictions(request: MetricsRequest):
+@router.post(
+    "/evaluate",
+    response_model=None,
+    responses={200: {"model": MetricsResponse}},
+    tags=["Evaluation"]
+)
+async def evaluate_predictions(
+    request: MetricsRequest,
+    service: PredictionService = Depends(get_prediction_service)
+):
     """
     Простое сравнение текущих прогнозов с реальными возгораниями из fires.csv.
 
@@ -238,20 +408,23 @@ async def evaluate_predictions(request: MetricsRequest):
     Returns:
         Evaluation metrics and matched predictions
     """
+    import numpy as np
+    import pandas as pd
+
     evaluation_id = str(uuid.uuid4())
 
     try:
-        service = get_prediction_service()
         upload_dir = Path(settings.UPLOAD_DIR)
 
+        uploads = _latest_uploads(upload_dir)
+
         # Load fires.csv
         fires_path = None
-        fires_files = sorted(upload_dir.glob("*_fires_*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
 
         if request.reference_data_path:
             fires_path = request.reference_data_path
-        elif fires_files:
-            fires_path = str(fires_files[0])
+        elif uploads['fires']:
+            fires_path = uploads['fires']
         else:
             default_fires_path = Path(settings.DATA_DIR) / "fires.csv"
             if default_fires_path.exists():
@@ -263,32 +436,34 @@ async def evaluate_predictions(request: MetricsRequest):
                 detail="Файл fires.csv не найден"
             )
 
-        fires_df = pd.read_csv(fires_path)
+        fires_df = pd.read_csv(fires_path, engine='pyarrow', usecols=['Штабель', 'Дата начала'])
 
         # Переименовываем колонки
         fires_df = fires_df.rename(columns={
             "Штабель": "pile_id",
             "Дата начала": "fire_start"
         })
-        fires_df['fire_start'] = pd.to_datetime(fires_df['fire_start'])
+        fires_df['fire_start'] = pd.to_datetime(fires_df['fire_start'], format='ISO8601', cache=True, errors='coerce')
 
-        # Берем первое возгорание для каждого штабеля
-        fires_first = fires_df.sort_values('fire_start').groupby('pile_id').first().reset_index()
+        # Первое возгорание для каждого штабеля, индексированное по pile_id
+        fires_by_pile = fires_df.groupby('pile_id', sort=False)['fire_start'].min()
 
         # Загружаем текущие прогнозы
-        supplies_files = list(upload_dir.glob("*_supplies_*.csv"))
-        temperature_files = list(upload_dir.glob("*_temperature_*.csv"))
-        weather_files = list(upload_dir.glob("*_weather_*.csv"))
-
-        if not supplies_files or not temperature_files:
+        if not uploads['supplies'] or not uploads['temperature']:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Файлы данных не найдены"
             )
 
-        supplies_path = str(max(supplies_files, key=lambda p: p.stat().st_mtime))
-        temperature_path = str(max(temperature_files, key=lambda p: p.stat().st_mtime))
-        weather_paths = [str(p) for p in weather_files]
+        if not uploads['weather']:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Файлы погоды не найдены"
+            )
+
+        supplies_path = uploads['supplies']
+        temperature_path = uploads['temperature']
+        weather_paths = uploads['weather']
 
         # Генерируем прогнозы
         predictions, _ = service.predict_from_csv_files(
@@ -298,56 +473,38 @@ async def evaluate_predictions(request: MetricsRequest):
             horizon_days=30
         )
 
-        # Сравниваем прогнозы с реальными возгораниями
-        matched_predictions = []
-        total_diff = 0
-        correct_pm1 = 0
-        correct_pm2 = 0
-        correct_pm3 = 0
-
-        for pred in predictions:
-            fire_row = fires_first[fires_first['pile_id'] == pred.pile_id]
-            if len(fire_row) > 0:
-                real_fire_date = fire_row.iloc[0]['fire_start']
-
-                # Конвертируем predicted_fire_date в datetime если это строка
-                if isinstance(pred.predicted_fire_date, str):
-                    pred_date = pd.to_datetime(pred.predicted_fire_date)
-                    pred_fire_date_str = pred.predicted_fire_date
-                else:
-                    pred_date = pred.predicted_fire_date
-                    pred_fire_date_str = pred_date.isoformat()
-
-                # Конвертируем observation_date в строку если это не строка
-                if isinstance(pred.observation_date, str):
-                    obs_date_str = pred.observation_date
-                else:
-                    obs_date_str = pred.observation_date.isoformat()
-
-                days_diff = (real_fire_date - pred_date).days
-                abs_diff = abs(days_diff)
-
-                total_diff += abs_diff
-                if abs_diff <= 1:
-                    correct_pm1 += 1
-                if abs_diff <= 2:
-                    correct_pm2 += 1
-                if abs_diff <= 3:
-                    correct_pm3 += 1
-
-                matched_predictions.append({
-                    'pile_id': pred.pile_id,
-                    'observation_date': obs_date_str,
-                    'predicted_fire_date': pred_fire_date_str,
-                    'real_fire_date': real_fire_date.isoformat(),
-                    'days_difference': int(days_diff),
-                    'abs_days_difference': int(abs_diff),
-                    'is_match': abs_diff <= 2,
-                    'stockyard': pred.stockyard,
-                    'coal_grade': pred.coal_grade
-                })
-
-        total_matches = len(matched_predictions)
+        # Сравниваем прогнозы с реальными возгораниями по pile_id
+        preds_df = pd.DataFrame({
+            'pile_id': np.array([p.pile_id for p in predictions], dtype=np.int64),
+            'observation_date': pd.to_datetime([p.observation_date for p in predictions]),
+            'predicted_fire_date': pd.to_datetime([p.predicted_fire_date for p in predictions]),
+            'stockyard': pd.Series([p.stockyard for p in predictions], dtype=object),
+            'coal_grade': pd.Series([p.coal_grade for p in predictions], dtype=object)
+        })
+
+        preds_df['fire_start'] = preds_df['pile_id'].map(fires_by_pile)
+        merged = preds_df.dropna(subset=['fire_start']).copy()
+
+        merged['days_difference'] = (merged['fire_start'] - merged['predicted_fire_date']).dt.days
+        merged['abs_days_difference'] = merged['days_difference'].abs()
+        abs_diff = merged['abs_days_difference']
+
+        total_matches = len(merged)
+        total_diff = int(abs_diff.sum())
+        correct_pm1 = int((abs_diff <= 1).sum())
+        correct_pm2 = int((abs_diff <= 2).sum())
+        correct_pm3 = int((abs_diff <= 3).sum())
+
+        merged['is_match'] = abs_diff <= 2
+        merged['real_fire_date'] = merged['fire_start']
+        for col in ('observation_date', 'predicted_fire_date', 'real_fire_date'):
+            merged[col] = merged[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+
+        matched_predictions = merged[[
+            'pile_id', 'observation_date', 'predicted_fire_date', 'real_fire_date',
+            'days_difference', 'abs_days_difference', 'is_match', 'stockyard', 'coal_grade'
+        ]].to_dict(orient='records')
+
         mae = total_diff / total_matches if total_matches > 0 else 0.0
         accuracy_pm1 = correct_pm1 / total_matches if total_matches > 0 else 0.0
         accuracy_pm2 = correct_pm2 / total_matches if total_matches > 0 else 0.0
@@ -355,7 +512,7 @@ async def evaluate_predictions(request: MetricsRequest):
 
         logger.info(f"Evaluation: {total_matches} matches, MAE={mae:.2f}, Accuracy±2={accuracy_pm2:.1%}")
 
-        return MetricsResponse(
+        response = MetricsResponse(
             evaluation_id=evaluation_id,
             mae=mae,
             rmse=None,
@@ -364,9 +521,10 @@ async def evaluate_predictions(request: MetricsRequest):
             accuracy_pm3=accuracy_pm3,
             total_predictions=total_matches,
             correct_pm2=correct_pm2,
-            evaluated_at=datetime.utcnow(),
+            evaluated_at=utc_now(),
             matched_predictions=matched_predictions
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
 
     except HTTPException:
         raise
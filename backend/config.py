@@ -19,6 +19,8 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Coal Fire Prediction API"
     VERSION: str = "1.0.0"
     DEBUG: bool = True
+    # Uvicorn worker processes outside DEBUG; each one loads its own copy of the model
+    WORKERS: int = 1
 
     # CORS Configuration
     ALLOWED_ORIGINS: List[str] = [
@@ -27,6 +29,9 @@ class Settings(BaseSettings):
         "http://127.0.0.1:3000",
         "http://127.0.0.1:5173"
     ]
+    CORS_ALLOW_METHODS: List[str] = ["GET", "POST"]
+    CORS_ALLOW_HEADERS: List[str] = ["Content-Type", "Authorization"]
+    CORS_MAX_AGE: int = 86400  # Cache preflight responses for a day
 
     # File Upload Configuration
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
@@ -46,6 +51,9 @@ class Settings(BaseSettings):
     RISK_HIGH_THRESHOLD: int = 7
     RISK_MEDIUM_THRESHOLD: int = 14
 
+    # Number of predict_from_csv_files results kept in memory (0 disables caching)
+    PREDICTION_CACHE_SIZE: int = 32
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
@@ -12,9 +12,8 @@ FastAPI main application entry point.
 import logging
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
-from datetime import datetime
 
 from backend.api.routes import router
 from backend.api.models import ErrorResponse
@@ -54,7 +53,8 @@ app = FastAPI(
     """,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS middleware
@@ -62,8 +62,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=settings.CORS_ALLOW_METHODS,
+    allow_headers=settings.CORS_ALLOW_HEADERS,
+    max_age=settings.CORS_MAX_AGE,
 )
 
 
@@ -72,14 +73,13 @@ app.add_middleware(
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors."""
     logger.error(f"Validation error: {exc.errors()}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content=ErrorResponse(
             error="Validation Error",
             message="Invalid request data",
-            details=exc.errors(),
-            timestamp=datetime.utcnow()
-        ).dict()
+            details=exc.errors()
+        ).model_dump(mode="json")
     )
 
 
@@ -87,13 +87,12 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def file_not_found_handler(request: Request, exc: FileNotFoundError):
     """Handle file not found errors."""
     logger.error(f"File not found: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content=ErrorResponse(
             error="File Not Found",
-            message=str(exc),
-            timestamp=datetime.utcnow()
-        ).dict()
+            message=str(exc)
+        ).model_dump(mode="json")
     )
 
 
@@ -101,13 +100,12 @@ async def file_not_found_handler(request: Request, exc: FileNotFoundError):
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions."""
     logger.error(f"Unexpected error: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content=ErrorResponse(
             error="Internal Server Error",
-            message="An unexpected error occurred. Please try again later.",
-            timestamp=datetime.utcnow()
-        ).dict()
+            message="An unexpected error occurred. Please try again later."
+        ).model_dump(mode="json")
     )
 
 
@@ -140,10 +138,13 @@ async def startup_event():
     logger.info(f"API prefix: {settings.API_V1_PREFIX}")
     logger.info(f"Model path: {settings.MODEL_PATH}")
 
+    app.state.model_loaded = False
+
     try:
         # Initialize prediction service (loads model)
         from backend.services.prediction_service import get_prediction_service
         service = get_prediction_service()
+        app.state.model_loaded = service.is_model_loaded()
         logger.info("Prediction service initialized successfully")
 
         # Log model info
@@ -173,5 +174,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower()
+        log_level=settings.LOG_LEVEL.lower(),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=1 if settings.DEBUG else settings.WORKERS
     )
\ No newline at end of file
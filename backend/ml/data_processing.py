@@ -5,50 +5,193 @@ Based on Ygol.ipynb data preparation pipeline.
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import csv
 import glob
+from concurrent.futures import ThreadPoolExecutor
+from numba import njit
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Raw columns used by the pipeline with their Arrow types; everything else
+# is skipped at parse time. Date columns stay strings and are parsed in parse_dates.
+GRADE_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+FIRES_SCHEMA = {
+    "Груз": GRADE_TYPE,
+    "Склад": pa.int32(),
+    "Дата начала": pa.string(),
+    "Дата оконч.": pa.string(),
+    "Нач.форм.штабеля": pa.string(),
+    "Штабель": pa.int32(),
+}
+TEMPERATURE_SCHEMA = {
+    "Штабель": pa.int32(),
+    "Марка": GRADE_TYPE,
+    "Максимальная температура": pa.float64(),
+    "Пикет": pa.string(),
+    "Дата акта": pa.string(),
+    "Смена": pa.float64(),
+}
+SUPPLIES_SCHEMA = {
+    "ВыгрузкаНаСклад": pa.string(),
+    "Штабель": pa.int32(),
+    "ПогрузкаНаСудно": pa.string(),
+    "На склад, тн": pa.float64(),
+    "На судно, тн": pa.float64(),
+    "Склад": pa.int32(),
+}
+WEATHER_SCHEMA = {
+    "dt": pa.string(),
+    "date": pa.string(),
+    "datetime": pa.string(),
+    "time": pa.string(),
+    "t": pa.float64(),
+    "humidity": pa.float64(),
+    "precipitation": pa.float64(),
+    "v_avg": pa.float64(),
+    "v_max": pa.float64(),
+    "cloudcover": pa.float64(),
+    "visibility": pa.float64(),
+}
+
+WEATHER_COLUMNS = {
+    "t": "temp_air",
+    "p": "pressure",
+    "humidity": "humidity",
+    "precipitation": "precip",
+    "wind_dir": "wind_dir",
+    "v_avg": "wind_avg",
+    "v_max": "wind_max",
+    "cloudcover": "cloudcover",
+    "visibility": "visibility",
+    "weather_code": "weather_code"
+}
+WEATHER_FLOAT_COLS = ["temp_air", "humidity", "precip", "wind_avg", "wind_max", "cloudcover", "visibility"]
+# Upper bound on threads used to read CSV files
+MAX_READ_WORKERS = 8
+# Columns averaged per day in build_weather_daily
+WEATHER_MEAN_COLS = ["temp_air", "humidity", "wind_avg", "cloudcover", "visibility"]
+
+
+def _read_csv_table(path, schema: Dict[str, pa.DataType]) -> pa.Table:
+    """
+    Read a CSV file into an Arrow table, keeping only columns from the schema.
+
+    Args:
+        path: Path to CSV file
+        schema: Mapping of column name to Arrow type
+
+    Returns:
+        Arrow table with the schema columns present in the file
+    """
+    # Only the schema columns present in the header are converted; the rest are skipped by the parser
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    columns = [c for c in header if c in schema]
+    convert_options = pacsv.ConvertOptions(column_types=schema, include_columns=columns)
+    return pacsv.read_csv(path, convert_options=convert_options)
+
+
+def read_csv_frame(path, schema: Dict[str, pa.DataType]) -> pd.DataFrame:
+    """
+    Read a CSV file with pyarrow into a DataFrame, keeping only columns from the schema.
 
-def load_raw_data(data_dir: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    Args:
+        path: Path to CSV file
+        schema: Mapping of column name to Arrow type (e.g. SUPPLIES_SCHEMA)
+
+    Returns:
+        DataFrame with the schema columns present in the file
+    """
+    return _read_csv_table(path, schema).to_pandas()
+
+
+def read_csv_concat(paths: List, schema: Dict[str, pa.DataType],
+                    executor: Optional[ThreadPoolExecutor] = None) -> pd.DataFrame:
+    """
+    Read CSV files with a common layout into a single DataFrame.
+
+    Files are concatenated as Arrow tables (columns missing in some files are
+    null-filled) and converted to pandas once, instead of concatenating
+    per-file DataFrames.
+
+    Args:
+        paths: Paths to CSV files
+        schema: Mapping of column name to Arrow type (e.g. WEATHER_SCHEMA)
+        executor: Optional thread pool to parse the files concurrently
+
+    Returns:
+        Combined DataFrame
+    """
+    def read(path) -> pa.Table:
+        return _read_csv_table(path, schema)
+
+    tables = list(executor.map(read, paths)) if executor is not None else [read(path) for path in paths]
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
+def empty_frame(schema: Dict[str, pa.DataType]) -> pd.DataFrame:
+    """
+    Create an empty DataFrame with the same dtypes read_csv_frame would produce.
+
+    Args:
+        schema: Mapping of column name to Arrow type (e.g. FIRES_SCHEMA)
+
+    Returns:
+        Empty DataFrame with typed schema columns
+    """
+    return pa.schema(list(schema.items())).empty_table().to_pandas()
+
+
+def load_raw_data(data_dir: str,
+                  include_weather: bool = True
+                  ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
     """
     Load raw data from CSV files.
 
     Args:
         data_dir: Path to data directory
+        include_weather: Whether to load and concatenate the weather files
 
     Returns:
-        Tuple of (fires, temperature, supplies, weather) DataFrames
+        Tuple of (fires, temperature, supplies, weather) DataFrames;
+        weather is None when include_weather is False
     """
     data_dir = Path(data_dir)
 
     logger.info(f"Loading data from {data_dir}")
 
-    fires = pd.read_csv(data_dir / "fires.csv", sep=",")
-    temperature = pd.read_csv(data_dir / "temperature.csv", sep=",")
-    supplies = pd.read_csv(data_dir / "supplies.csv", sep=",")
+    # pyarrow releases the GIL while parsing, so the files are read concurrently
+    weather_files = glob.glob(str(data_dir / "weather_data_*.csv")) if include_weather else []
+    with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+        fires_future = executor.submit(_read_csv_table, data_dir / "fires.csv", FIRES_SCHEMA)
+        temperature_future = executor.submit(_read_csv_table, data_dir / "temperature.csv", TEMPERATURE_SCHEMA)
+        supplies_future = executor.submit(_read_csv_table, data_dir / "supplies.csv", SUPPLIES_SCHEMA)
+        weather = read_csv_concat(weather_files, WEATHER_SCHEMA, executor) if include_weather else None
 
-    # Load all weather files
-    weather_files = glob.glob(str(data_dir / "weather_data_*.csv"))
-    weather_list = [pd.read_csv(f, sep=",") for f in weather_files]
-    weather = pd.concat(weather_list, ignore_index=True)
+        fires = fires_future.result().to_pandas()
+        temperature = temperature_future.result().to_pandas()
+        supplies = supplies_future.result().to_pandas()
 
     logger.info(f"Loaded fires: {fires.shape}, temperature: {temperature.shape}, "
-                f"supplies: {supplies.shape}, weather: {weather.shape}")
+                f"supplies: {supplies.shape}, weather: {None if weather is None else weather.shape}")
 
     return fires, temperature, supplies, weather
 
 
 def rename_columns(fires: pd.DataFrame, temperature: pd.DataFrame,
-                   supplies: pd.DataFrame, weather: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+                   supplies: pd.DataFrame, weather: Optional[pd.DataFrame]
+                   ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
     """
     Rename columns to English names.
 
     Args:
-        fires, temperature, supplies, weather: Raw DataFrames
+        fires, temperature, supplies, weather: Raw DataFrames (weather may be None)
 
     Returns:
         Tuple of renamed DataFrames
@@ -81,63 +224,159 @@ def rename_columns(fires: pd.DataFrame, temperature: pd.DataFrame,
         "Склад": "stockyard"
     })
 
-    weather = weather.rename(columns={
-        "t": "temp_air",
-        "p": "pressure",
-        "humidity": "humidity",
-        "precipitation": "precip",
-        "wind_dir": "wind_dir",
-        "v_avg": "wind_avg",
-        "v_max": "wind_max",
-        "cloudcover": "cloudcover",
-        "visibility": "visibility",
-        "weather_code": "weather_code"
-    })
+    if weather is not None:
+        weather = weather.rename(columns=WEATHER_COLUMNS)
 
     return fires, temperature, supplies, weather
 
 
+def _to_datetime(values: pd.Series) -> pd.Series:
+    """
+    Parse ISO 8601 date strings; the explicit format selects pandas' fast parser
+    instead of inferring the format row by row.
+    """
+    return pd.to_datetime(values, format="ISO8601", errors="coerce", cache=True)
+
+
+def parse_weather_dates(weather: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the weather timestamp column and add a day-level "date" column.
+
+    Args:
+        weather: Weather DataFrame with renamed columns
+
+    Returns:
+        Weather DataFrame with parsed dates
+    """
+    date_col = None
+    for cand in ["dt", "date", "datetime", "time"]:
+        if cand in weather.columns:
+            date_col = cand
+            break
+
+    if date_col is None:
+        raise ValueError("Date column not found in weather data")
+
+    weather[date_col] = _to_datetime(weather[date_col])
+    weather["date"] = weather[date_col].dt.floor("D")
+
+    return weather
+
+
 def parse_dates(fires: pd.DataFrame, temperature: pd.DataFrame,
-                supplies: pd.DataFrame, weather: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+                supplies: pd.DataFrame, weather: Optional[pd.DataFrame]
+                ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
     """
     Parse date columns to datetime format.
 
     Args:
-        fires, temperature, supplies, weather: DataFrames with renamed columns
+        fires, temperature, supplies, weather: DataFrames with renamed columns (weather may be None)
 
     Returns:
         Tuple of DataFrames with parsed dates
     """
     # fires
-    fires["fire_start"] = pd.to_datetime(fires["fire_start"], errors="coerce")
-    fires["fire_end"] = pd.to_datetime(fires["fire_end"], errors="coerce")
-    fires["pile_start"] = pd.to_datetime(fires["pile_start"], errors="coerce")
+    fires["fire_start"] = _to_datetime(fires["fire_start"])
+    fires["fire_end"] = _to_datetime(fires["fire_end"])
+    fires["pile_start"] = _to_datetime(fires["pile_start"])
 
     # temperature
-    temperature["date"] = pd.to_datetime(temperature["date"], errors="coerce")
+    temperature["date"] = _to_datetime(temperature["date"])
 
     # supplies
-    supplies["unload_time"] = pd.to_datetime(supplies["unload_time"], errors="coerce")
-    supplies["load_time"] = pd.to_datetime(supplies["load_time"], errors="coerce")
-    supplies["unload_date"] = pd.to_datetime(supplies["unload_time"].dt.date)
-    supplies["load_date"] = pd.to_datetime(supplies["load_time"].dt.date)
+    supplies["unload_time"] = _to_datetime(supplies["unload_time"])
+    supplies["load_time"] = _to_datetime(supplies["load_time"])
+    supplies["unload_date"] = supplies["unload_time"].dt.floor("D")
+    supplies["load_date"] = supplies["load_time"].dt.floor("D")
 
-    # weather - find date column
-    date_col = None
-    for cand in ["dt", "date", "datetime", "time"]:
-        if cand in weather.columns:
-            date_col = cand
-            break
+    if weather is not None:
+        weather = parse_weather_dates(weather)
 
-    if date_col is None:
-        raise ValueError("Date column not found in weather data")
+    return fires, temperature, supplies, weather
+
+
+def normalize_dtypes(fires: pd.DataFrame, temperature: pd.DataFrame,
+                     supplies: pd.DataFrame, weather: Optional[pd.DataFrame]
+                     ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Downcast numeric columns to float32 and low-cardinality strings to category.
+
+    stockyard keeps its numeric dtype so its string form ("3.0") matches the
+    categories the model was trained on.
+
+    Args:
+        fires, temperature, supplies, weather: DataFrames with parsed dates (weather may be None)
 
-    weather[date_col] = pd.to_datetime(weather[date_col], errors="coerce")
-    weather["date"] = pd.to_datetime(weather[date_col].dt.date)
+    Returns:
+        Tuple of DataFrames with compact dtypes
+    """
+    float_cols = [
+        (temperature, ["temp_max"]),
+        (supplies, ["to_stock_tons", "from_stock_tons"]),
+    ]
+    if weather is not None:
+        float_cols.append((weather, WEATHER_FLOAT_COLS))
+    for df, cols in float_cols:
+        for col in cols:
+            if col in df.columns:
+                df[col] = df[col].astype("float32")
+
+    for df in (fires, temperature, supplies):
+        for col in ["coal_grade", "location"]:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
 
     return fires, temperature, supplies, weather
 
 
+@njit(cache=True)
+def _temperature_daily_kernel(codes, values, grade_isna, n_groups):
+    """
+    Single pass over temperature rows computing per-group statistics.
+
+    Mean and std use Welford's update; std has ddof=1 like pandas.
+    For each group returns the row holding the first non-null coal grade
+    (or the group's first row when all grades are null).
+    """
+    count = np.zeros(n_groups, dtype=np.int64)
+    mean = np.zeros(n_groups, dtype=np.float64)
+    m2 = np.zeros(n_groups, dtype=np.float64)
+    vmin = np.full(n_groups, np.inf)
+    vmax = np.full(n_groups, -np.inf)
+    first_row = np.full(n_groups, -1, dtype=np.int64)
+    grade_found = np.zeros(n_groups, dtype=np.bool_)
+
+    for i in range(codes.shape[0]):
+        g = codes[i]
+        if not grade_found[g]:
+            if first_row[g] < 0 or not grade_isna[i]:
+                first_row[g] = i
+            grade_found[g] = not grade_isna[i]
+
+        v = values[i]
+        if np.isnan(v):
+            continue
+        count[g] += 1
+        delta = v - mean[g]
+        mean[g] += delta / count[g]
+        m2[g] += delta * (v - mean[g])
+        if v < vmin[g]:
+            vmin[g] = v
+        if v > vmax[g]:
+            vmax[g] = v
+
+    std = np.full(n_groups, np.nan)
+    for g in range(n_groups):
+        if count[g] == 0:
+            mean[g] = np.nan
+            vmin[g] = np.nan
+            vmax[g] = np.nan
+        elif count[g] > 1:
+            std[g] = np.sqrt(m2[g] / (count[g] - 1))
+
+    return mean, vmin, vmax, std, count, first_row
+
+
 def build_temperature_daily(temperature: pd.DataFrame) -> pd.DataFrame:
     """
     Aggregate temperature data by pile and day.
@@ -148,21 +387,33 @@ def build_temperature_daily(temperature: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Daily aggregated temperature DataFrame
     """
-    agg = (
-        temperature
-        .sort_values(["pile_id", "date"])
-        .groupby(["pile_id", "date"])
-        .agg(
-            temp_max_mean=("temp_max", "mean"),
-            temp_max_min=("temp_max", "min"),
-            temp_max_max=("temp_max", "max"),
-            temp_max_std=("temp_max", "std"),
-            n_measurements=("temp_max", "count"),
-            coal_grade=("coal_grade", "first")
-        )
-        .reset_index()
+    temperature = temperature[temperature["pile_id"].notna() & temperature["date"].notna()]
+
+    codes, keys = pd.factorize(
+        pd.MultiIndex.from_arrays([temperature["pile_id"], temperature["date"]]),
+        sort=True
     )
 
+    temp_max = temperature["temp_max"]
+    mean, vmin, vmax, std, count, first_row = _temperature_daily_kernel(
+        codes,
+        temp_max.to_numpy(dtype=np.float64, na_value=np.nan),
+        temperature["coal_grade"].isna().to_numpy(),
+        len(keys)
+    )
+
+    out_dtype = temp_max.dtype if temp_max.dtype.kind == "f" else np.float64
+    agg = pd.DataFrame({
+        "pile_id": keys.get_level_values(0).astype(temperature["pile_id"].dtype),
+        "date": keys.get_level_values(1),
+        "temp_max_mean": mean.astype(out_dtype),
+        "temp_max_min": vmin.astype(out_dtype),
+        "temp_max_max": vmax.astype(out_dtype),
+        "temp_max_std": std.astype(out_dtype),
+        "n_measurements": count,
+        "coal_grade": temperature["coal_grade"].iloc[first_row].reset_index(drop=True)
+    })
+
     return agg
 
 
@@ -176,36 +427,39 @@ def build_supplies_daily(supplies: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Daily aggregated supplies DataFrame with stock levels
     """
-    # Incoming to stock
-    incoming = (
-        supplies
-        .dropna(subset=["unload_date"])
-        .groupby(["pile_id", "unload_date"])
-        .agg(to_stock_tons_daily=("to_stock_tons", "sum"))
-        .reset_index()
-        .rename(columns={"unload_date": "date"})
-    )
-
-    # Outgoing from stock
-    outgoing = (
-        supplies
-        .dropna(subset=["load_date"])
-        .groupby(["pile_id", "load_date"])
-        .agg(from_stock_tons_daily=("from_stock_tons", "sum"))
+    # Incoming and outgoing moves stacked into one long frame, aggregated in a single groupby
+    moves = pd.concat([
+        pd.DataFrame({
+            "pile_id": supplies["pile_id"],
+            "date": supplies["unload_date"],
+            "direction": 0,
+            "tons": supplies["to_stock_tons"],
+        }),
+        pd.DataFrame({
+            "pile_id": supplies["pile_id"],
+            "date": supplies["load_date"],
+            "direction": 1,
+            "tons": supplies["from_stock_tons"],
+        }),
+    ], ignore_index=True).dropna(subset=["date"])
+
+    daily = (
+        moves
+        .groupby(["pile_id", "date", "direction"])["tons"]
+        .sum()
+        .unstack("direction", fill_value=0.0)
+        .reindex(columns=[0, 1], fill_value=0.0)
+        .rename(columns={0: "to_stock_tons_daily", 1: "from_stock_tons_daily"})
         .reset_index()
-        .rename(columns={"load_date": "date"})
     )
+    daily.columns.name = None
 
-    daily = pd.merge(incoming, outgoing, on=["pile_id", "date"], how="outer")
-
-    daily["to_stock_tons_daily"] = daily["to_stock_tons_daily"].fillna(0.0)
-    daily["from_stock_tons_daily"] = daily["from_stock_tons_daily"].fillna(0.0)
-
-    daily = daily.sort_values(["pile_id", "date"])
+    # groupby output is already sorted by (pile_id, date)
     daily["net_flow"] = daily["to_stock_tons_daily"] - daily["from_stock_tons_daily"]
 
-    # Cumulative stock
-    daily["stock_tons"] = daily.groupby("pile_id")["net_flow"].cumsum()
+    # Cumulative stock per pile; a global cumsum minus per-pile offsets would drift
+    # with the total tonnage across all piles
+    daily["stock_tons"] = daily.groupby("pile_id", sort=False)["net_flow"].cumsum()
 
     return daily
 
@@ -220,23 +474,69 @@ def build_weather_daily(weather: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Daily aggregated weather DataFrame
     """
-    agg = (
-        weather
-        .groupby("date")
-        .agg(
-            temp_air_mean=("temp_air", "mean"),
-            temp_air_min=("temp_air", "min"),
-            temp_air_max=("temp_air", "max"),
-            humidity_mean=("humidity", "mean"),
-            precip_sum=("precip", "sum"),
-            wind_avg_mean=("wind_avg", "mean"),
-            wind_max_max=("wind_max", "max"),
-            cloudcover_mean=("cloudcover", "mean"),
-            visibility_mean=("visibility", "mean")
-        )
-        .reset_index()
+    # Dict form runs all column aggregations in one pass; key order is
+    # irrelevant for the date merge, so group keys are left unsorted
+    agg = weather.groupby("date", sort=False).agg({
+        "temp_air": ["mean", "min", "max"],
+        "humidity": "mean",
+        "precip": "sum",
+        "wind_avg": "mean",
+        "wind_max": "max",
+        "cloudcover": "mean",
+        "visibility": "mean"
+    })
+    agg.columns = ["_".join(col).rstrip("_") for col in agg.columns]
+    return agg.reset_index()
+
+
+def load_weather_daily(weather_files: List[str]) -> pd.DataFrame:
+    """
+    Build daily weather aggregates file by file.
+
+    Each file is reduced to per-day partial aggregates (sums, non-null counts,
+    min, max) before combining, so raw rows are never concatenated; files are
+    processed concurrently.
+    The result matches build_weather_daily on the concatenated files.
+
+    Args:
+        weather_files: Paths to weather CSV files
+
+    Returns:
+        Daily aggregated weather DataFrame
+    """
+    partial_aggs = {}
+    for col in WEATHER_MEAN_COLS:
+        partial_aggs[f"{col}_sum"] = (col, "sum")
+        partial_aggs[f"{col}_count"] = (col, "count")
+    partial_aggs.update(
+        temp_air_min=("temp_air", "min"),
+        temp_air_max=("temp_air", "max"),
+        precip_sum=("precip", "sum"),
+        wind_max_max=("wind_max", "max"),
     )
-    return agg
+
+    def partial_daily(path) -> pd.DataFrame:
+        weather = _read_csv_table(path, WEATHER_SCHEMA).to_pandas()
+        weather = parse_weather_dates(weather.rename(columns=WEATHER_COLUMNS))
+        return weather.groupby("date", sort=False).agg(**partial_aggs)
+
+    with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+        partials = list(executor.map(partial_daily, weather_files))
+
+    combine_funcs = {
+        col: "min" if col.endswith("_min") else "max" if col.endswith("_max") else "sum"
+        for col in partial_aggs
+    }
+    combined = pd.concat(partials).groupby("date", sort=False).agg(combine_funcs)
+
+    for col in WEATHER_MEAN_COLS:
+        combined[f"{col}_mean"] = combined[f"{col}_sum"] / combined[f"{col}_count"]
+
+    daily_cols = [
+        "temp_air_mean", "temp_air_min", "temp_air_max", "humidity_mean", "precip_sum",
+        "wind_avg_mean", "wind_max_max", "cloudcover_mean", "visibility_mean"
+    ]
+    return combined[daily_cols].astype("float32").reset_index()
 
 
 def add_fire_labels(base_df: pd.DataFrame, fires: pd.DataFrame,
@@ -252,26 +552,34 @@ def add_fire_labels(base_df: pd.DataFrame, fires: pd.DataFrame,
     Returns:
         DataFrame with fire labels
     """
+    # Per-pile attributes of the earliest fire (first non-null value in fire order)
     fire_first = (
         fires
         .dropna(subset=["fire_start"])
         .sort_values("fire_start")
-        .groupby("pile_id")
+        .groupby("pile_id", sort=False)[["fire_start", "coal_grade", "stockyard"]]
         .first()
-        .reset_index()[["pile_id", "fire_start", "coal_grade", "stockyard"]]
     )
 
-    df = base_df.merge(fire_first, on="pile_id", how="left", suffixes=("", "_fire"))
+    # Broadcast the per-pile values by pile_id instead of merging full frames
+    aligned = fire_first.reindex(base_df["pile_id"].to_numpy())
+    aligned.index = base_df.index
 
-    df["days_to_fire"] = (df["fire_start"] - df["date"]).dt.days
-    df["days_to_fire"] = df["days_to_fire"].astype("float")
+    df = base_df.copy(deep=False)
+    for col in aligned.columns:
+        df[f"{col}_fire" if col in df.columns else col] = aligned[col]
 
-    df["fire_in_horizon"] = np.where(
-        (df["days_to_fire"] >= 0) & (df["days_to_fire"] <= horizon_days),
-        1, 0
-    )
+    # Whole days to the fire (floor, like Timedelta.days); NaN where the pile never burned
+    delta = df["fire_start"].to_numpy() - df["date"].to_numpy()
+    has_fire = ~np.isnat(delta)
+    days_to_fire = np.full(len(df), np.nan, dtype=np.float32)
+    days_to_fire[has_fire] = delta[has_fire] // np.timedelta64(1, "D")
+    df["days_to_fire"] = days_to_fire
 
-    df["ever_fire"] = np.where(df["fire_start"].notna(), 1, 0)
+    days = df["days_to_fire"].to_numpy()
+    df["fire_in_horizon"] = ((days >= 0) & (days <= horizon_days)).astype(np.uint8)
+
+    df["ever_fire"] = has_fire.astype(np.uint8)
 
     return df
 
@@ -306,6 +614,68 @@ def add_stockyard_from_supplies(full_df: pd.DataFrame, supplies: pd.DataFrame) -
     return df
 
 
+def sort_by_pile_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order rows by (pile_id, date) with a fresh RangeIndex.
+
+    build_temperature_daily already emits rows in this order and the left joins
+    that follow keep it, so the O(N log N) sort only runs when the order check fails.
+
+    Args:
+        df: DataFrame with pile_id and date columns
+
+    Returns:
+        DataFrame ordered by pile and date
+    """
+    if not pd.MultiIndex.from_arrays([df["pile_id"], df["date"]]).is_monotonic_increasing:
+        df = df.sort_values(["pile_id", "date"])
+    return df.reset_index(drop=True)
+
+
+def _pile_day_key(df: pd.DataFrame) -> np.ndarray:
+    """
+    Pack (pile_id, date) into a single int64 merge key.
+
+    pile_id goes into the high 32 bits and the day number since epoch into the
+    low 32 bits, so the join hashes one integer column instead of two keys.
+
+    Args:
+        df: DataFrame with pile_id and day-level date columns
+
+    Returns:
+        Array of int64 keys
+    """
+    days = df["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    return (df["pile_id"].to_numpy().astype(np.int64) << 32) | (days & 0xFFFFFFFF)
+
+
+def merge_daily_features(temp_daily: pd.DataFrame, supplies_daily: pd.DataFrame,
+                         weather_daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join daily supplies and weather onto daily temperature observations.
+
+    Args:
+        temp_daily: Daily temperature aggregates, unique on (pile_id, date)
+        supplies_daily: Daily supplies aggregates, unique on (pile_id, date)
+        weather_daily: Daily weather aggregates, unique on date
+
+    Returns:
+        One row per temperature observation day with supplies and weather columns
+    """
+    # Join on the packed key; validate documents the key uniqueness and sort=False
+    # keeps the left order instead of re-sorting the output
+    base = (
+        temp_daily
+        .assign(pile_day=_pile_day_key(temp_daily))
+        .merge(
+            supplies_daily.drop(columns=["pile_id", "date"]).assign(pile_day=_pile_day_key(supplies_daily)),
+            on="pile_day", how="left", sort=False, validate="one_to_one"
+        )
+        .drop(columns="pile_day")
+    )
+    return base.merge(weather_daily, on="date", how="left", sort=False, validate="many_to_one")
+
+
 def build_full_dataset(data_dir: str, horizon_days: int = 3) -> pd.DataFrame:
     """
     Main function to build complete dataset.
@@ -319,22 +689,23 @@ def build_full_dataset(data_dir: str, horizon_days: int = 3) -> pd.DataFrame:
     """
     logger.info("Building full dataset...")
 
-    fires, temperature, supplies, weather = load_raw_data(data_dir)
-    fires, temperature, supplies, weather = rename_columns(fires, temperature, supplies, weather)
-    fires, temperature, supplies, weather = parse_dates(fires, temperature, supplies, weather)
+    # Weather is aggregated per file in load_weather_daily instead of being concatenated
+    fires, temperature, supplies, _ = load_raw_data(data_dir, include_weather=False)
+    fires, temperature, supplies, _ = rename_columns(fires, temperature, supplies, None)
+    fires, temperature, supplies, _ = parse_dates(fires, temperature, supplies, None)
+    fires, temperature, supplies, _ = normalize_dtypes(fires, temperature, supplies, None)
 
     temp_daily = build_temperature_daily(temperature)
     supplies_daily = build_supplies_daily(supplies)
-    weather_daily = build_weather_daily(weather)
+    weather_daily = load_weather_daily(glob.glob(str(Path(data_dir) / "weather_data_*.csv")))
 
-    base = temp_daily.merge(supplies_daily, on=["pile_id", "date"], how="left")
-    base = base.merge(weather_daily, on="date", how="left")
+    base = merge_daily_features(temp_daily, supplies_daily, weather_daily)
 
     full_df = add_fire_labels(base, fires, horizon_days=horizon_days)
     full_df = add_stockyard_from_supplies(full_df, supplies)
 
     # Sort by pile and date
-    full_df = full_df.sort_values(["pile_id", "date"]).reset_index(drop=True)
+    full_df = sort_by_pile_date(full_df)
 
     logger.info(f"Full dataset shape: {full_df.shape}")
 
@@ -0,0 +1,41 @@
+"""
+Numba kernels for evaluation metrics.
+
+Kept out of the serving modules so the kernel is only compiled (or loaded
+from the on-disk cache) when metrics are actually calculated.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def error_metrics_kernel(predicted: np.ndarray, actual: np.ndarray):
+    """
+    Absolute-error statistics in a single pass.
+
+    Args:
+        predicted: Predicted days to fire
+        actual: Actual days to fire (NaN where unknown)
+
+    Returns:
+        Tuple of (sum of errors, number of non-NaN errors, count <= 1, count <= 2, count <= 3)
+    """
+    error_sum = 0.0
+    n_errors = 0
+    within_1 = 0
+    within_2 = 0
+    within_3 = 0
+    for i in range(predicted.shape[0]):
+        error = abs(predicted[i] - actual[i])
+        if np.isnan(error):
+            continue
+        error_sum += error
+        n_errors += 1
+        if error <= 1:
+            within_1 += 1
+        if error <= 2:
+            within_2 += 1
+        if error <= 3:
+            within_3 += 1
+    return error_sum, n_errors, within_1, within_2, within_3
@@ -8,10 +8,15 @@ import pickle
 import logging
 from pathlib import Path
 from typing import Tuple, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import joblib
 
 logger = logging.getLogger(__name__)
 
+# Первый байт pickle протокола >= 2; артефакты joblib+lz4 начинаются с сигнатуры LZ4
+PICKLE_MAGIC = b"\x80"
+
 
 class FirePredictionModel:
     """
@@ -45,7 +50,14 @@ class FirePredictionModel:
         logger.info(f"Загрузка модели из {self.model_path}...")
 
         with open(self.model_path, "rb") as f:
-            artifacts = pickle.load(f)
+            is_plain_pickle = f.read(1) == PICKLE_MAGIC
+            if is_plain_pickle:
+                # Старые артефакты, сохраненные через pickle
+                f.seek(0)
+                artifacts = pickle.load(f)
+
+        if not is_plain_pickle:
+            artifacts = joblib.load(self.model_path)
 
         self.model = artifacts["model"]
         self.feature_cols = artifacts["feature_cols"]
@@ -74,13 +86,17 @@ class FirePredictionModel:
         if missing_cols:
             raise ValueError(f"Отсутствуют необходимые признаки: {missing_cols}")
 
-        # Выбираем только нужные признаки в правильном порядке
-        X = data[self.feature_cols].copy()
-
-        # Приводим категориальные признаки к строковому типу
-        for col in self.cat_cols:
-            if col in X.columns:
-                X[col] = X[col].astype("string")
+        # Собираем признаки в правильном порядке без копирования всей таблицы;
+        # категориальные признаки приводим к строковому типу
+        cat_cols = set(self.cat_cols)
+        X = pd.DataFrame(
+            {
+                col: data[col].astype("string") if col in cat_cols else data[col]
+                for col in self.feature_cols
+            },
+            index=data.index,
+            copy=False
+        )
 
         # Предсказание
         predictions = self.model.predict(X)
@@ -105,18 +121,22 @@ class FirePredictionModel:
         # Предсказываем дни до возгорания
         days_pred = self.predict_days_to_fire(data)
 
+        # Даты наблюдения парсим только если они еще не datetime64
+        observation_date = data[date_col]
+        if not pd.api.types.is_datetime64_any_dtype(observation_date):
+            observation_date = pd.to_datetime(observation_date)
+
         # Создаем результирующий DataFrame
         result = pd.DataFrame({
             "pile_id": data["pile_id"] if "pile_id" in data.columns else range(len(data)),
-            "observation_date": pd.to_datetime(data[date_col]),
+            "observation_date": observation_date,
             "predicted_days_to_fire": days_pred,
-            "predicted_days_to_fire_rounded": np.round(days_pred).astype(int),
+            "predicted_days_to_fire_rounded": np.round(days_pred).astype(np.int32),
         })
 
         # Вычисляем предсказанную дату возгорания
-        result["predicted_fire_date"] = result.apply(
-            lambda row: row["observation_date"] + timedelta(days=int(row["predicted_days_to_fire_rounded"])),
-            axis=1
+        result["predicted_fire_date"] = result["observation_date"] + pd.to_timedelta(
+            result["predicted_days_to_fire_rounded"], unit="D"
         )
 
         return result
@@ -5,8 +5,14 @@ Prediction service for handling ML inference and business logic.
 import pandas as pd
 import numpy as np
 import logging
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 import uuid
 
@@ -17,6 +23,21 @@ from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Key features reported with each prediction
+FEATURE_KEYS = [
+    'stock_tons', 'temp_max_mean', 'temp_air_mean',
+    'humidity_mean', 'precip_sum', 'wind_avg_mean'
+]
+
+# Observations per model inference / post-processing batch
+PREDICTION_BATCH_SIZE = 4096
+
+RISK_LEVELS = np.array(['critical', 'high', 'medium', 'low'])
+
+# Upper bounds (inclusive) of the high and medium confidence ranges
+CONFIDENCE_THRESHOLDS = np.array([14, 21])
+CONFIDENCE_LEVELS = np.array(['high', 'medium', 'low'])
+
 
 class PredictionService:
     """Service for handling predictions."""
@@ -24,6 +45,9 @@ class PredictionService:
     def __init__(self):
         """Initialize prediction service."""
         self.model: Optional[FirePredictionModel] = None
+        # LRU cache of predict_from_csv_files results keyed by input file stats
+        self._prediction_cache: "OrderedDict[str, Tuple[List[PilePrediction], Dict[str, Any]]]" = OrderedDict()
+        self._prediction_cache_lock = threading.Lock()
         self._load_model()
 
     def _load_model(self) -> None:
@@ -46,128 +70,176 @@ class PredictionService:
             raise RuntimeError("Model not loaded")
         return self.model.get_model_info()
 
-    def _calculate_risk_level(self, days_to_fire: int) -> str:
+    def _classify_risk_levels(self, days_to_fire: np.ndarray) -> List[str]:
         """
-        Calculate risk level based on days to fire.
+        Classify risk level by days to fire: critical, high, medium, or low.
 
         Args:
-            days_to_fire: Number of days until predicted fire
+            days_to_fire: Array of rounded days until predicted fire
 
         Returns:
-            Risk level: critical, high, medium, or low
+            Risk level per prediction
         """
-        if days_to_fire <= settings.RISK_CRITICAL_THRESHOLD:
-            return "critical"
-        elif days_to_fire <= settings.RISK_HIGH_THRESHOLD:
-            return "high"
-        elif days_to_fire <= settings.RISK_MEDIUM_THRESHOLD:
-            return "medium"
-        else:
-            return "low"
+        thresholds = np.array([
+            settings.RISK_CRITICAL_THRESHOLD,
+            settings.RISK_HIGH_THRESHOLD,
+            settings.RISK_MEDIUM_THRESHOLD
+        ])
+        # side='left': a value equal to a threshold falls into that threshold's bucket
+        return RISK_LEVELS[np.searchsorted(thresholds, days_to_fire, side='left')].tolist()
 
-    def _calculate_confidence(self, days_to_fire: float, features: Dict[str, Any]) -> str:
+    def _classify_confidences(self, days_to_fire: np.ndarray) -> List[str]:
         """
-        Calculate confidence level for prediction.
+        Classify confidence level by prediction range: high, medium, or low.
 
         Args:
-            days_to_fire: Predicted days to fire
-            features: Feature values used for prediction
+            days_to_fire: Array of predicted days to fire
 
         Returns:
-            Confidence level: high, medium, or low
+            Confidence level per prediction
         """
-        # Simple confidence calculation based on prediction range
-        if 0 <= days_to_fire <= 14:
-            return "high"
-        elif 14 < days_to_fire <= 21:
-            return "medium"
-        else:
-            return "low"
+        buckets = np.searchsorted(CONFIDENCE_THRESHOLDS, days_to_fire, side='left')
+        # Negative predictions are low confidence; NaN already sorts past the last threshold
+        buckets[days_to_fire < 0] = len(CONFIDENCE_THRESHOLDS)
+        return CONFIDENCE_LEVELS[buckets].tolist()
 
-    def _extract_features(self, row: pd.Series) -> Dict[str, float]:
+    def predict_from_dataframe(
+        self,
+        data: pd.DataFrame,
+        horizon_days: int = 3
+    ) -> List[PilePrediction]:
         """
-        Extract key features from a data row.
+        Generate predictions from a DataFrame.
 
         Args:
-            row: Data row
+            data: Processed DataFrame with features
+            horizon_days: Forecast horizon in days
 
         Returns:
-            Dictionary of key features
+            List of pile predictions
         """
-        features = {}
-
-        # Extract available features
-        feature_keys = [
-            'stock_tons', 'temp_max_mean', 'temp_air_mean',
-            'humidity_mean', 'precip_sum', 'wind_avg_mean'
+        predictions = [
+            prediction
+            for batch in self.iter_predict_from_dataframe(data, horizon_days)
+            for prediction in batch
         ]
 
-        for key in feature_keys:
-            if key in row.index:
-                value = row[key]
-                features[key] = float(value) if pd.notna(value) else 0.0
-
-        return features
+        logger.info(f"Generated {len(predictions)} predictions")
+        return predictions
 
-    def predict_from_dataframe(
+    def iter_predict_from_dataframe(
         self,
         data: pd.DataFrame,
-        horizon_days: int = 3
-    ) -> List[PilePrediction]:
+        horizon_days: int = 3,
+        batch_size: int = PREDICTION_BATCH_SIZE
+    ) -> Iterator[List[PilePrediction]]:
         """
-        Generate predictions from a DataFrame.
+        Generate predictions batch by batch.
+
+        Model inference and PilePrediction construction run on at most
+        batch_size observations at a time, so a consumer that handles batches
+        as they arrive keeps memory bounded by the batch size.
 
         Args:
             data: Processed DataFrame with features
             horizon_days: Forecast horizon in days
+            batch_size: Number of observations per batch
 
-        Returns:
-            List of pile predictions
+        Yields:
+            Lists of pile predictions in input order
         """
         if not self.model:
             raise RuntimeError("Model not loaded")
 
         logger.info(f"Generating predictions for {len(data)} observations")
 
-        # Get predictions from model
-        result_df = self.model.predict_fire_dates(data, date_col="date")
-
-        # Merge with original data to get additional info
-        result_df = result_df.merge(
-            data[['pile_id', 'stockyard', 'coal_grade']].drop_duplicates(subset=['pile_id']),
-            on='pile_id',
-            how='left'
+        # Per-pile lookups shared by all batches; the duplicated() masks select only
+        # the needed columns of one row per pile instead of copying whole rows
+        pile_ids = data['pile_id']
+        pile_info = (
+            data.loc[~pile_ids.duplicated(keep='first'), ['pile_id', 'stockyard', 'coal_grade']]
+            .set_index('pile_id')
         )
+        feature_keys = [key for key in FEATURE_KEYS if key in data.columns]
+        # Features of the last observation per pile
+        pile_features = data.loc[~pile_ids.duplicated(keep='last'), ['pile_id', *feature_keys]].set_index('pile_id')
+
+        def predict_batch(start: int) -> pd.DataFrame:
+            # Get predictions from model
+            return self.model.predict_fire_dates(data.iloc[start:start + batch_size], date_col="date")
+
+        # Double buffering: XGBoost releases the GIL, so inference of the next batch
+        # runs on a worker thread while the current batch is turned into objects
+        starts = range(0, len(data), batch_size)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(predict_batch, starts[0]) if starts else None
+            for i in range(len(starts)):
+                result_df = pending.result()
+                if i + 1 < len(starts):
+                    pending = executor.submit(predict_batch, starts[i + 1])
+                yield self._build_predictions(result_df, pile_info, pile_features)
+
+    def _build_predictions(
+        self,
+        result_df: pd.DataFrame,
+        pile_info: pd.DataFrame,
+        pile_features: pd.DataFrame
+    ) -> List[PilePrediction]:
+        """
+        Turn model output into PilePrediction objects.
+
+        Args:
+            result_df: Output of FirePredictionModel.predict_fire_dates
+            pile_info: stockyard and coal_grade indexed by pile_id
+            pile_features: Reported feature values indexed by pile_id
+
+        Returns:
+            List of pile predictions
+        """
+        # Look up per-pile info and features by pile_id instead of joining frames
+        pile_ids = result_df['pile_id'].to_numpy()
+        info_df = pile_info.reindex(pile_ids)
+        feature_keys = pile_features.columns.tolist()
+        features_df = pile_features.reindex(pile_ids).astype('float64').fillna(0.0)
+
+        # Calculate risk and confidence for all predictions at once
+        risk_levels = self._classify_risk_levels(result_df['predicted_days_to_fire_rounded'].to_numpy())
+        confidences = self._classify_confidences(result_df['predicted_days_to_fire'].to_numpy())
+
+        # model_construct stores values as given, so dates go in as plain datetime, not pd.Timestamp
+        observation_dates = pd.DatetimeIndex(result_df['observation_date']).to_pydatetime()
+        predicted_fire_dates = pd.DatetimeIndex(result_df['predicted_fire_date']).to_pydatetime()
 
         # Create prediction objects
+        columns = ['pile_id', 'predicted_days_to_fire', 'predicted_days_to_fire_rounded']
+        rows = zip(
+            result_df[columns].itertuples(index=False, name=None),
+            observation_dates,
+            predicted_fire_dates,
+            info_df[['stockyard', 'coal_grade']].itertuples(index=False, name=None),
+            features_df.itertuples(index=False, name=None),
+            risk_levels,
+            confidences
+        )
         predictions = []
-        for idx, row in result_df.iterrows():
-            # Get original data row for features
-            orig_row = data[data['pile_id'] == row['pile_id']].iloc[-1]
-
-            # Extract features
-            features = self._extract_features(orig_row)
-
-            # Calculate risk and confidence
-            days_rounded = int(row['predicted_days_to_fire_rounded'])
-            risk_level = self._calculate_risk_level(days_rounded)
-            confidence = self._calculate_confidence(row['predicted_days_to_fire'], features)
-
-            prediction = PilePrediction(
-                pile_id=int(row['pile_id']),
-                stockyard=int(row['stockyard']) if pd.notna(row.get('stockyard')) else None,
-                coal_grade=str(row['coal_grade']) if pd.notna(row.get('coal_grade')) else None,
-                observation_date=row['observation_date'],
-                predicted_fire_date=row['predicted_fire_date'],
-                predicted_days_to_fire=float(row['predicted_days_to_fire']),
-                predicted_days_to_fire_rounded=days_rounded,
+        for ((pile_id, days_to_fire, days_to_fire_rounded), observation_date, predicted_fire_date,
+             (stockyard, coal_grade), feature_values, risk_level, confidence) in rows:
+            # Trust boundary: every value is already coerced to its field type above,
+            # so pydantic validation is skipped for these internally built objects
+            prediction = PilePrediction.model_construct(
+                pile_id=int(pile_id),
+                stockyard=int(stockyard) if pd.notna(stockyard) else None,
+                coal_grade=str(coal_grade) if pd.notna(coal_grade) else None,
+                observation_date=observation_date,
+                predicted_fire_date=predicted_fire_date,
+                predicted_days_to_fire=float(days_to_fire),
+                predicted_days_to_fire_rounded=int(days_to_fire_rounded),
                 confidence=confidence,
                 risk_level=risk_level,
-                features=features
+                features=dict(zip(feature_keys, feature_values))
             )
             predictions.append(prediction)
 
-        logger.info(f"Generated {len(predictions)} predictions")
         return predictions
 
     def predict_from_csv_files(
@@ -189,15 +261,84 @@ class PredictionService:
         Returns:
             Tuple of (List of pile predictions, metadata dict with date range info)
         """
+        if not weather_paths:
+            raise ValueError("At least one weather file is required for prediction")
+
+        cache_key = self._input_cache_key([supplies_path, temperature_path, *weather_paths], horizon_days)
+        with self._prediction_cache_lock:
+            cached = self._prediction_cache.get(cache_key)
+            if cached is not None:
+                self._prediction_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.info("Returning cached predictions for unchanged input files")
+            predictions, date_range_info = cached
+            return list(predictions), dict(date_range_info)
+
+        predictions, date_range_info = self._predict_from_csv_files(
+            supplies_path, temperature_path, weather_paths, horizon_days
+        )
+
+        if settings.PREDICTION_CACHE_SIZE > 0:
+            with self._prediction_cache_lock:
+                self._prediction_cache[cache_key] = (list(predictions), dict(date_range_info))
+                while len(self._prediction_cache) > settings.PREDICTION_CACHE_SIZE:
+                    self._prediction_cache.popitem(last=False)
+
+        return predictions, date_range_info
+
+    def _input_cache_key(self, paths: List[str], horizon_days: int) -> str:
+        """
+        Build a cache key from input file identities.
+
+        Args:
+            paths: Input file paths
+            horizon_days: Forecast horizon in days
+
+        Returns:
+            Hex digest over resolved path, size and mtime of every file plus the horizon
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            stat = os.stat(path)
+            digest.update(f"{Path(path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        digest.update(f"horizon={horizon_days}".encode())
+        return digest.hexdigest()
+
+    def _predict_from_csv_files(
+        self,
+        supplies_path: str,
+        temperature_path: str,
+        weather_paths: List[str],
+        horizon_days: int
+    ) -> Tuple[List[PilePrediction], Dict[str, Any]]:
+        """
+        Uncached implementation of predict_from_csv_files.
+        """
         logger.info("Processing CSV files for prediction")
 
-        # Load data from individual files
-        supplies_df = pd.read_csv(supplies_path)
-        temperature_df = pd.read_csv(temperature_path)
-        weather_list = [pd.read_csv(f) for f in weather_paths]
-        weather_df = pd.concat(weather_list, ignore_index=True)
-        # Create empty fires df to satisfy the function signatures
-        fires_df = pd.DataFrame(columns=["Груз", "Склад", "Дата начала", "Дата оконч.", "Нач.форм.штабеля", "Штабель"])
+        # Load data from individual files; pyarrow releases the GIL, so files parse in parallel
+        max_workers = min(len(weather_paths) + 2, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            supplies_future = executor.submit(
+                data_processing.read_csv_frame, supplies_path, data_processing.SUPPLIES_SCHEMA
+            )
+            temperature_future = executor.submit(
+                data_processing.read_csv_frame, temperature_path, data_processing.TEMPERATURE_SCHEMA
+            )
+            # Weather files are combined as Arrow tables and converted to pandas once
+            weather_df = data_processing.read_csv_concat(weather_paths, data_processing.WEATHER_SCHEMA, executor)
+            supplies_df = supplies_future.result()
+            temperature_df = temperature_future.result()
+
+        # Nothing to predict for empty inputs; skip the merges and the model entirely
+        for name, df in (("supplies", supplies_df), ("temperature", temperature_df), ("weather", weather_df)):
+            if df.empty:
+                logger.warning(f"No rows in {name} data, skipping prediction")
+                return [], {}
+
+        # Create empty fires df to satisfy the function signatures; typed like a real
+        # fires file so coal_grade stays categorical and stockyard numeric downstream
+        fires_df = data_processing.empty_frame(data_processing.FIRES_SCHEMA)
 
         # Process data using functions from data_processing
         fires, temp, supp, weather = data_processing.rename_columns(fires_df, temperature_df, supplies_df, weather_df)
@@ -207,14 +348,17 @@ class PredictionService:
         supplies_daily = data_processing.build_supplies_daily(supp)
         weather_daily = data_processing.build_weather_daily(weather)
 
-        base = temp_daily.merge(supplies_daily, on=["pile_id", "date"], how="left")
-        base = base.merge(weather_daily, on="date", how="left")
+        base = data_processing.merge_daily_features(temp_daily, supplies_daily, weather_daily)
 
         processed_data = data_processing.add_fire_labels(base, fires, horizon_days=horizon_days)
         processed_data = data_processing.add_stockyard_from_supplies(processed_data, supp)
 
-        # Sort by pile and date
-        processed_data = processed_data.sort_values(["pile_id", "date"]).reset_index(drop=True)
+        # Sort by pile and date (a no-op check when the pipeline already produced that order)
+        processed_data = data_processing.sort_by_pile_date(processed_data)
+
+        if processed_data.empty:
+            logger.warning("No pile-days left after merging inputs, skipping prediction")
+            return [], self._extract_date_range_info(processed_data, weather)
 
         # Extract date range information
         date_range_info = self._extract_date_range_info(processed_data, weather)
@@ -237,41 +381,39 @@ class PredictionService:
         """
         date_info = {}
 
-        def safe_isoformat(dt):
-            if pd.notna(dt):
-                if hasattr(dt, 'isoformat'):
-                    return dt.isoformat()
-                return str(dt)
-            return None
+        def column_range(df: pd.DataFrame) -> Tuple[Any, Any, bool]:
+            # datetime64 min/max are Timestamp or NaT, so no per-value type checks are needed
+            dates = df['date']
+            return dates.min(), dates.max(), pd.api.types.is_datetime64_any_dtype(dates)
+
+        def to_iso(dt, is_dt: bool):
+            if pd.isna(dt):
+                return None
+            return dt.isoformat() if is_dt else str(dt)
 
         # Get date range from processed data
         if 'date' in processed_data.columns and not processed_data['date'].empty:
-            min_date = processed_data['date'].min()
-            max_date = processed_data['date'].max()
-
-            date_info['data_start_date'] = safe_isoformat(min_date)
-            date_info['data_end_date'] = safe_isoformat(max_date)
+            min_date, max_date, is_dt = column_range(processed_data)
 
-            if pd.notna(min_date) and pd.notna(max_date):
-                if hasattr(min_date, 'year') and hasattr(max_date, 'year'):
-                    date_info['data_years'] = list(range(min_date.year, max_date.year + 1))
+            date_info['data_start_date'] = to_iso(min_date, is_dt)
+            date_info['data_end_date'] = to_iso(max_date, is_dt)
 
+            if is_dt and pd.notna(min_date) and pd.notna(max_date):
+                date_info['data_years'] = list(range(min_date.year, max_date.year + 1))
 
         # Get weather file date ranges and determine primary year range from it
         if 'date' in weather_df.columns and not weather_df['date'].empty:
-            weather_min = weather_df['date'].min()
-            weather_max = weather_df['date'].max()
+            weather_min, weather_max, is_dt = column_range(weather_df)
 
-            date_info['weather_start_date'] = safe_isoformat(weather_min)
-            date_info['weather_end_date'] = safe_isoformat(weather_max)
+            date_info['weather_start_date'] = to_iso(weather_min, is_dt)
+            date_info['weather_end_date'] = to_iso(weather_max, is_dt)
 
             # Extract years from the full weather data range
-            if pd.notna(weather_min) and pd.notna(weather_max):
-                if hasattr(weather_min, 'year') and hasattr(weather_max, 'year'):
-                    weather_years = list(range(weather_min.year, weather_max.year + 1))
-                    date_info['years'] = weather_years
-                    date_info['weather_years'] = weather_years
-                    date_info['primary_year'] = weather_max.year
+            if is_dt and pd.notna(weather_min) and pd.notna(weather_max):
+                weather_years = list(range(weather_min.year, weather_max.year + 1))
+                date_info['years'] = weather_years
+                date_info['weather_years'] = weather_years
+                date_info['primary_year'] = weather_max.year
 
         logger.info(f"Extracted date range: {date_info}")
         return date_info
@@ -293,21 +435,24 @@ class PredictionService:
         """
         logger.info("Calculating evaluation metrics")
 
-        # Convert predictions to DataFrame
-        pred_df = pd.DataFrame([
-            {
-                'pile_id': p.pile_id,
-                'predicted_fire_date': p.predicted_fire_date,
-                'predicted_days_to_fire': p.predicted_days_to_fire_rounded
-            }
-            for p in predictions
-        ])
+        # Convert predictions to DataFrame from typed column arrays
+        n = len(predictions)
+        pred_df = pd.DataFrame({
+            'pile_id': np.fromiter((p.pile_id for p in predictions), dtype=np.int64, count=n),
+            'predicted_fire_date': pd.to_datetime([p.predicted_fire_date for p in predictions]),
+            'predicted_days_to_fire': np.fromiter(
+                (p.predicted_days_to_fire_rounded for p in predictions), dtype=np.int64, count=n
+            )
+        })
 
-        # Merge with reference data
+        # Merge with reference data; both sides hold one row per observation day, so
+        # piles repeat on each side. sort=False keeps prediction order instead of sorting keys
         merged = pred_df.merge(
             reference_data[['pile_id', 'fire_start', 'days_to_fire']],
             on='pile_id',
-            how='inner'
+            how='inner',
+            sort=False,
+            validate='many_to_many'
         )
 
         if len(merged) == 0:
@@ -321,22 +466,28 @@ class PredictionService:
                 'correct_pm2': 0
             }
 
-        # Calculate errors
-        errors = np.abs(merged['predicted_days_to_fire'] - merged['days_to_fire'])
+        # Calculate errors and metrics in one fused pass; numba is only needed here
+        from backend.ml.metrics import error_metrics_kernel
+
+        n = len(merged)
+        error_sum, n_errors, within_1, within_2, within_3 = error_metrics_kernel(
+            merged['predicted_days_to_fire'].to_numpy(dtype=np.float64),
+            merged['days_to_fire'].to_numpy(dtype=np.float64)
+        )
 
-        # Calculate metrics
-        mae = float(np.mean(errors))
-        accuracy_pm1 = float(np.mean(errors <= 1))
-        accuracy_pm2 = float(np.mean(errors <= 2))
-        accuracy_pm3 = float(np.mean(errors <= 3))
+        # Missing actual values are skipped by MAE but count against accuracy
+        mae = error_sum / n_errors if n_errors else float('nan')
+        accuracy_pm1 = within_1 / n
+        accuracy_pm2 = within_2 / n
+        accuracy_pm3 = within_3 / n
 
         metrics = {
             'mae': mae,
             'accuracy_pm1': accuracy_pm1,
             'accuracy_pm2': accuracy_pm2,
             'accuracy_pm3': accuracy_pm3,
-            'total_predictions': len(merged),
-            'correct_pm2': int(np.sum(errors <= 2))
+            'total_predictions': n,
+            'correct_pm2': within_2
         }
 
         logger.info(f"Metrics calculated: MAE={mae:.3f}, Accuracy±2={accuracy_pm2:.1%}")
@@ -377,11 +528,22 @@ class PredictionService:
             "Дата начала": "fire_start"
         })
 
-        # Преобразуем fire_start в datetime
-        fires_renamed['fire_start'] = pd.to_datetime(fires_renamed['fire_start'])
+        # Даты приводим к datetime64 один раз, до merge
+        fires_renamed['fire_start'] = pd.to_datetime(
+            fires_renamed['fire_start'], format='ISO8601', cache=True, errors='coerce'
+        )
+        predicted_fire_date = pd.to_datetime(predictions_df['predicted_fire_date'], format='ISO8601', cache=True)
+        if 'observation_date' in predictions_df.columns:
+            observation_date = pd.to_datetime(predictions_df['observation_date'], format='ISO8601', cache=True)
+        else:
+            observation_date = predicted_fire_date
+        predictions_df = predictions_df.assign(
+            predicted_fire_date=predicted_fire_date,
+            observation_date=observation_date
+        )
 
-        # Берем только первое возгорание для каждого штабеля
-        fires_first = fires_renamed.sort_values('fire_start').groupby('pile_id').first().reset_index()
+        # Берем только первое возгорание для каждого штабеля (минимум без сортировки)
+        fires_first = fires_renamed.groupby('pile_id', sort=False, as_index=False)['fire_start'].min()
 
         logger.info(f"Unique piles with fires: {len(fires_first)}")
 
@@ -389,7 +551,9 @@ class PredictionService:
         merged = predictions_df.merge(
             fires_first[['pile_id', 'fire_start']],
             on='pile_id',
-            how='inner'
+            how='inner',
+            sort=False,
+            validate='many_to_one'
         )
 
         if len(merged) == 0:
@@ -406,13 +570,10 @@ class PredictionService:
                 'comparison_data': []
             }
 
-        # Calculate difference in days
-        merged['predicted_fire_date'] = pd.to_datetime(merged['predicted_fire_date'])
-        merged['observation_date'] = pd.to_datetime(merged.get('observation_date', merged['predicted_fire_date']))
-
         # Проверяем, был ли прогноз сделан ДО реального возгорания
         merged['prediction_before_fire'] = merged['observation_date'] < merged['fire_start']
 
+        # Calculate difference in days
         merged['days_difference'] = (merged['fire_start'] - merged['predicted_fire_date']).dt.days
         merged['abs_days_difference'] = merged['days_difference'].abs()
 
@@ -441,17 +602,29 @@ class PredictionService:
         accuracy_pm3 = float((valid_predictions['abs_days_difference'] <= 3).mean())
 
         # Prepare matched predictions
-        matched_predictions = []
-        for _, row in valid_predictions.iterrows():
-            matched_predictions.append({
-                'pile_id': int(row['pile_id']),
-                'observation_date': row['observation_date'].isoformat(),
-                'predicted_fire_date': row['predicted_fire_date'].isoformat(),
-                'real_fire_date': row['fire_start'].isoformat(),
-                'days_difference': int(row['days_difference']),
-                'abs_days_difference': int(row['abs_days_difference']),
-                'is_match': row['abs_days_difference'] <= 2
-            })
+        # Даты форматируем целиком по колонке, без Timestamp на каждую ячейку
+        iso_format = '%Y-%m-%dT%H:%M:%S'
+        rows = zip(
+            valid_predictions['pile_id'].to_numpy(dtype=np.int64).tolist(),
+            valid_predictions['observation_date'].dt.strftime(iso_format).tolist(),
+            valid_predictions['predicted_fire_date'].dt.strftime(iso_format).tolist(),
+            valid_predictions['fire_start'].dt.strftime(iso_format).tolist(),
+            valid_predictions['days_difference'].to_numpy(dtype=np.int64).tolist(),
+            valid_predictions['abs_days_difference'].to_numpy(dtype=np.int64).tolist()
+        )
+        matched_predictions = [
+            {
+                'pile_id': pile_id,
+                'observation_date': observation_date,
+                'predicted_fire_date': predicted_fire_date,
+                'real_fire_date': real_fire_date,
+                'days_difference': days_difference,
+                'abs_days_difference': abs_days_difference,
+                'is_match': abs_days_difference <= 2
+            }
+            for (pile_id, observation_date, predicted_fire_date, real_fire_date,
+                 days_difference, abs_days_difference) in rows
+        ]
 
         metrics = {
             'mae': mae,
@@ -474,13 +647,7 @@ class PredictionService:
         }
 
 
-# Global service instance
-_prediction_service: Optional[PredictionService] = None
-
-
+@lru_cache(maxsize=1)
 def get_prediction_service() -> PredictionService:
     """Get or create prediction service instance."""
-    global _prediction_service
-    if _prediction_service is None:
-        _prediction_service = PredictionService()
-    return _prediction_service
\ No newline at end of file
+    return PredictionService()
\ No newline at end of file